@@ -0,0 +1,20 @@
+-- Unique natural key on active offers so the scraper can UPSERT instead of
+-- deactivating and re-inserting every offer on each run
+-- Run this on Supabase SQL Editor (NULLS NOT DISTINCT requires PostgreSQL 15+)
+
+-- Deactivate duplicate active offers first, keeping the most recently updated one
+UPDATE offers o
+SET active = false
+FROM (
+    SELECT id, ROW_NUMBER() OVER (
+        PARTITION BY dealer_id, year, model, trim, offer_type, term_months
+        ORDER BY updated_at DESC, created_at DESC
+    ) AS rn
+    FROM offers
+    WHERE active = true
+) dupes
+WHERE o.id = dupes.id AND dupes.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_offers_natural_key
+ON offers (dealer_id, year, model, trim, offer_type, term_months) NULLS NOT DISTINCT
+WHERE active = true;
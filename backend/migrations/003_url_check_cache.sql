@@ -0,0 +1,10 @@
+-- Cache of offer source URLs that recently passed validation, so repeat
+-- validation runs can skip re-fetching them
+-- Run this on Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS url_check_cache (
+    source_url TEXT PRIMARY KEY,
+    last_ok TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_url_check_cache_last_ok ON url_check_cache (last_ok);
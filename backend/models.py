@@ -133,6 +133,14 @@ class Offer(Base):
         Index("idx_offers_payment", "monthly_payment", postgresql_where=(active == True)),
         Index("idx_offers_dealer", "dealer_id", postgresql_where=(active == True)),
         Index("idx_offers_type", "offer_type", postgresql_where=(active == True)),
+        # Natural key the scraper upserts on (see migrations/002_offers_natural_key.sql)
+        Index(
+            "uq_offers_natural_key",
+            "dealer_id", "year", "model", "trim", "offer_type", "term_months",
+            unique=True,
+            postgresql_where=(active == True),
+            postgresql_nulls_not_distinct=True,
+        ),
     )
 
 
@@ -200,3 +208,19 @@ class ChatUsage(Base):
     __table_args__ = (
         Index("idx_chat_usage_user_date", "user_id", "used_at"),
     )
+
+
+class UrlCheckCache(Base):
+    """Offer source URLs that recently passed validation."""
+
+    __tablename__ = "url_check_cache"
+
+    source_url: Mapped[str] = mapped_column(Text, primary_key=True)
+    last_ok: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index("idx_url_check_cache_last_ok", "last_ok"),
+    )
@@ -158,4 +158,5 @@ REQUEST_TIMEOUT = 30
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
 
 # Rate limiting
-DELAY_BETWEEN_DEALERS = 2  # seconds between dealers
+DELAY_BETWEEN_DEALERS = 2  # seconds between requests to the same host
+MAX_CONCURRENT_DEALERS = 4  # dealers scraped in parallel (bounded by OpenAI/DB limits)
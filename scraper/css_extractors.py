@@ -9,10 +9,12 @@ Supported platforms:
 - DealerInspire: Used by Airport Marina Honda, Norm Reeves Honda, Culver City Toyota, etc.
 """
 
+import functools
 import logging
 import re
+import sys
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
@@ -23,6 +25,7 @@ logger = logging.getLogger(__name__)
 # Shared parsing utilities
 # ============================================================
 
+@functools.lru_cache(maxsize=2048)
 def parse_price(text: str) -> Optional[float]:
     """Extract numeric price from text like '$293' or '$2,931'."""
     if not text:
@@ -46,6 +49,7 @@ def parse_term(text: str) -> Optional[int]:
     return None
 
 
+@functools.lru_cache(maxsize=2048)
 def parse_year_make_model(text: str, default_make: str = "Toyota") -> tuple[Optional[int], str, str, Optional[str]]:
     """
     Parse vehicle info from text like 'New 2026 Toyota Corolla Cross L 2WD (Natl)'.
@@ -119,42 +123,70 @@ def parse_expiration(text: str) -> Optional[str]:
     return None
 
 
-def make_offer_dict(year, make, model, trim, offer_type, monthly_payment,
-                    down_payment=None, term_months=None, annual_mileage=None,
-                    apr=None, offer_end_date=None, disclaimer=None, image_url=None,
-                    confidence=0.85, source_anchor=None):
-    """Create a standardized offer dict."""
-    return {
-        "year": year or datetime.now().year,
-        "make": make,
-        "model": model,
-        "trim": trim,
-        "offer_type": offer_type,
-        "monthly_payment": monthly_payment,
-        "down_payment": down_payment,
-        "term_months": term_months or 36,
-        "annual_mileage": annual_mileage,
-        "apr": apr,
-        "msrp": None,
-        "selling_price": None,
-        "offer_end_date": offer_end_date,
-        "disclaimer": disclaimer,
-        "confidence": confidence,
-        "image_url": image_url,
-        "source_anchor": source_anchor,
-        "extraction_method": "css",
-    }
-
-
-def dedupe_offers(offers: list[dict]) -> list[dict]:
+def reset_caches() -> None:
+    """Clear the memoized parser results (e.g. between scrape runs)."""
+    for parser in (parse_price, parse_year_make_model):
+        parser.cache_clear()
+
+
+OFFER_FIELDS = (
+    "year", "make", "model", "trim", "offer_type", "monthly_payment",
+    "down_payment", "term_months", "annual_mileage", "apr", "msrp",
+    "selling_price", "offer_end_date", "disclaimer", "confidence",
+    "image_url", "source_anchor", "extraction_method",
+)
+
+
+class OfferBatch:
+    """
+    Column-oriented accumulator for CSS-extracted offers.
+
+    Extractors append one value per field into parallel lists; dicts are
+    only built once, at the return boundary, via to_dicts().
+    """
+
+    def __init__(self):
+        self.columns = {field: [] for field in OFFER_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.columns["model"])
+
+    def append(self, year, make, model, trim, offer_type, monthly_payment,
+               down_payment=None, term_months=None, annual_mileage=None,
+               apr=None, offer_end_date=None, disclaimer=None, image_url=None,
+               confidence=0.85, source_anchor=None):
+        """Append one standardized offer."""
+        row = (
+            year or datetime.now().year, make, model, trim, offer_type,
+            monthly_payment, down_payment, term_months or 36, annual_mileage,
+            apr, None, None, offer_end_date, disclaimer, confidence,
+            image_url, source_anchor, "css",
+        )
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+
+    def to_dicts(self) -> list[dict]:
+        """Materialize the batch as a list of offer dicts."""
+        return [dict(zip(OFFER_FIELDS, row)) for row in zip(*self.columns.values())]
+
+
+def dedupe_offers(batch: OfferBatch) -> OfferBatch:
     """Remove duplicate offers based on year/model/payment."""
+    cols = batch.columns
+    keys = zip(cols["year"], cols["model"], cols["monthly_payment"])
     seen = set()
-    unique = []
-    for o in offers:
-        key = (o["year"], o["model"], o["monthly_payment"])
+    keep = []
+    for i, key in enumerate(keys):
         if key not in seen:
             seen.add(key)
-            unique.append(o)
+            keep.append(i)
+
+    if len(keep) == len(batch):
+        return batch
+
+    unique = OfferBatch()
+    for field, values in cols.items():
+        unique.columns[field] = [values[i] for i in keep]
     return unique
 
 
@@ -172,7 +204,7 @@ def extract_octane(html: str, base_url: str = "", default_make: str = "Toyota")
     - octane-specials-css-offer-price-subtext: "/month" or "apr"
     """
     soup = BeautifulSoup(html, "html.parser")
-    offers = []
+    batch = OfferBatch()
 
     title_elements = soup.select(
         '.octane-specials-css-vehicle-title, .octane-specials-css-vehicle-slide-title'
@@ -253,17 +285,17 @@ def extract_octane(html: str, base_url: str = "", default_make: str = "Toyota")
             if anchor_el and anchor_el.get('id'):
                 source_anchor = anchor_el['id']
 
-            offers.append(make_offer_dict(
+            batch.append(
                 year, make, model, trim, offer_type, monthly_payment,
                 down_payment=down_payment, term_months=term_months,
                 annual_mileage=annual_mileage, apr=apr, image_url=image_url,
                 source_anchor=source_anchor,
-            ))
+            )
         except Exception as e:
             logger.warning(f"Octane parse error: {e}")
             continue
 
-    offers = dedupe_offers(offers)
+    offers = dedupe_offers(batch).to_dicts()
     logger.info(f"Octane extractor: {len(offers)} offers")
     return offers
 
@@ -284,7 +316,7 @@ def extract_dealeron_gemini(html: str, base_url: str = "", default_make: str = "
     - vehicle-description: Due at signing, expiration
     """
     soup = BeautifulSoup(html, "html.parser")
-    offers = []
+    batch = OfferBatch()
 
     specials = soup.select('.vehicle-specials-banner')
     logger.info(f"DealerOn/Gemini: Found {len(specials)} banners")
@@ -346,17 +378,17 @@ def extract_dealeron_gemini(html: str, base_url: str = "", default_make: str = "
                     break
                 el = el.parent
 
-            offers.append(make_offer_dict(
+            batch.append(
                 year, make, model, trim, offer_type, monthly_payment,
                 down_payment=down_payment, term_months=term_months,
                 offer_end_date=expiration, disclaimer=desc_text[:500] if desc_text else None,
                 image_url=image_url, source_anchor=source_anchor,
-            ))
+            )
         except Exception as e:
             logger.warning(f"DealerOn parse error: {e}")
             continue
 
-    offers = dedupe_offers(offers)
+    offers = dedupe_offers(batch).to_dicts()
     logger.info(f"DealerOn/Gemini extractor: {len(offers)} offers")
     return offers
 
@@ -381,38 +413,49 @@ def extract_dealerinspire(html: str, base_url: str = "", default_make: str = "Ho
     - offer-description: Full text with embedded pricing (variant 2)
     """
     soup = BeautifulSoup(html, "html.parser")
-    offers = []
+    batch = OfferBatch()
 
     offer_cards = soup.select('li.special-offer')
     logger.info(f"DealerInspire: Found {len(offer_cards)} offer cards")
 
     for card in offer_cards:
         try:
-            full_text = card.get_text()
+            get_full_text = _lazy_text(card)
             # Capture anchor ID (e.g. "offer-29956" on the <li> element)
             source_anchor = card.get('id')
 
             # Try structured extraction first (Norm Reeves style)
             offerrate = card.select_one('.offerrate')
             if offerrate:
-                offers.extend(_extract_di_structured(card, full_text, base_url, default_make, source_anchor))
+                _extract_di_structured(batch, card, get_full_text, base_url, default_make, source_anchor)
             else:
                 # Fall back to text-based extraction (Airport Marina style)
-                offers.extend(_extract_di_text(card, full_text, base_url, default_make, source_anchor))
+                _extract_di_text(batch, card, get_full_text, base_url, default_make, source_anchor)
 
         except Exception as e:
             logger.warning(f"DealerInspire parse error: {e}")
             continue
 
-    offers = dedupe_offers(offers)
+    offers = dedupe_offers(batch).to_dicts()
     logger.info(f"DealerInspire extractor: {len(offers)} offers")
     return offers
 
 
-def _extract_di_structured(card, full_text: str, base_url: str, default_make: str, source_anchor: str = None) -> list[dict]:
-    """DealerInspire variant 1: Structured spans (offerrate, offerlabel)."""
-    results = []
+def _lazy_text(card) -> Callable[[], str]:
+    """Return a callable that builds card.get_text() on first use and caches it."""
+    cache = []
+
+    def get_text() -> str:
+        if not cache:
+            cache.append(card.get_text())
+        return cache[0]
+
+    return get_text
+
 
+def _extract_di_structured(batch: OfferBatch, card, get_full_text: Callable[[], str], base_url: str,
+                           default_make: str, source_anchor: str = None) -> None:
+    """DealerInspire variant 1: Structured spans (offerrate, offerlabel)."""
     h2 = card.select_one('h2')
     vehicle_text = h2.get_text(strip=True) if h2 else ""
 
@@ -426,7 +469,7 @@ def _extract_di_structured(card, full_text: str, base_url: str, default_make: st
         monthly_payment = parse_price(payment_match.group(0))
 
     if not monthly_payment:
-        return results
+        return
 
     # Down payment from offerlabel: "$3,500 due at lease signing..."
     offerlabel = card.select_one('.offerlabel')
@@ -436,8 +479,13 @@ def _extract_di_structured(card, full_text: str, base_url: str, default_make: st
     if down_match:
         down_payment = parse_price(down_match.group(0))
 
-    # Term from full text: "36 months" or "39 months"
-    term_months = parse_term(full_text)
+    # Term is usually in the rate/label spans; fall back to the full card text
+    term_months = parse_term(f"{rate_text} {label_text}")
+
+    # Only build the full card text once we know this card yields an offer
+    full_text = get_full_text()
+    if term_months is None:
+        term_months = parse_term(full_text)
 
     # Mileage
     annual_mileage = None
@@ -463,19 +511,19 @@ def _extract_di_structured(card, full_text: str, base_url: str, default_make: st
 
     disclaimer = full_text[:500].strip() if full_text else None
 
-    results.append(make_offer_dict(
+    batch.append(
         year, make, model, trim, offer_type, monthly_payment,
         down_payment=down_payment, term_months=term_months,
         annual_mileage=annual_mileage, offer_end_date=expiration,
         disclaimer=disclaimer, image_url=image_url, confidence=0.85,
         source_anchor=source_anchor,
-    ))
-    return results
+    )
 
 
-def _extract_di_text(card, full_text: str, base_url: str, default_make: str, source_anchor: str = None) -> list[dict]:
+def _extract_di_text(batch: OfferBatch, card, get_full_text: Callable[[], str], base_url: str,
+                     default_make: str, source_anchor: str = None) -> None:
     """DealerInspire variant 2: All data in paragraph text."""
-    results = []
+    full_text = get_full_text()
 
     # Look for patterns like "Lease for $159 a month" or "$189/mo"
     payment_match = re.search(
@@ -487,7 +535,7 @@ def _extract_di_text(card, full_text: str, base_url: str, default_make: str, sou
         payment_match = re.search(r'\$([\d,]+)\s*/mo', full_text, re.IGNORECASE)
 
     if not payment_match:
-        return results
+        return
 
     monthly_payment = float(payment_match.group(1).replace(',', ''))
 
@@ -536,14 +584,13 @@ def _extract_di_text(card, full_text: str, base_url: str, default_make: str, sou
         if src and 'dealerinspire' in src:
             image_url = src if src.startswith('http') else urljoin(base_url, src)
 
-    results.append(make_offer_dict(
+    batch.append(
         year, make, model, trim, offer_type, monthly_payment,
         down_payment=down_payment, term_months=term_months,
         annual_mileage=annual_mileage, offer_end_date=expiration,
         disclaimer=full_text[:500].strip(), image_url=image_url, confidence=0.80,
         source_anchor=source_anchor,
-    ))
-    return results
+    )
 
 
 # ============================================================
@@ -580,10 +627,19 @@ DEALER_PLATFORM_OVERRIDES = {
     "norm-reeves-honda-cerritos": "dealerinspire",
 }
 
+# Substrings that every supported platform's specials markup contains
+PLATFORM_MARKERS = ("octane-specials-css", "vehicle-specials", "special-offer")
+
+# Pages shorter than this can't hold a specials listing worth parsing
+MIN_CSS_HTML_LENGTH = 2000
+
+# Slugs we handle via override, interned for the per-dealer membership check
+_CSS_SLUGS = frozenset(sys.intern(slug) for slug in DEALER_PLATFORM_OVERRIDES)
+
 
 def has_css_extractor(dealer_slug: str) -> bool:
     """Check if we can handle this dealer with CSS (via slug override or auto-detect)."""
-    return dealer_slug in DEALER_PLATFORM_OVERRIDES
+    return dealer_slug in _CSS_SLUGS
 
 
 def extract_with_css(dealer_slug: str, html: str, base_url: str = "",
@@ -595,6 +651,11 @@ def extract_with_css(dealer_slug: str, html: str, base_url: str = "",
     2. Try auto-detecting platform from HTML
     3. Use appropriate platform extractor
     """
+    # Skip the BeautifulSoup parse when no supported platform could match
+    if len(html) < MIN_CSS_HTML_LENGTH or not any(marker in html for marker in PLATFORM_MARKERS):
+        logger.info(f"No platform markers in page for {dealer_slug}, skipping CSS extraction")
+        return []
+
     # Check slug override first
     platform = DEALER_PLATFORM_OVERRIDES.get(dealer_slug)
 
@@ -5,6 +5,7 @@ import logging
 import re
 from typing import Optional
 
+import tiktoken
 from bs4 import BeautifulSoup
 from openai import OpenAI
 
@@ -14,6 +15,22 @@ logger = logging.getLogger(__name__)
 
 client = OpenAI(api_key=OPENAI_API_KEY, timeout=60.0)
 
+EXTRACTION_MODEL = "gpt-4-turbo-preview"
+
+# Tokenizer for the extraction model, used to budget prompt size in tokens.
+# Loaded on first use: tiktoken downloads the BPE file the first time.
+_ENC = None
+
+# Upper bound on characters per token; only this much of the text is encoded
+MAX_CHARS_PER_TOKEN = 8
+
+
+def _encoder():
+    global _ENC
+    if _ENC is None:
+        _ENC = tiktoken.encoding_for_model(EXTRACTION_MODEL)
+    return _ENC
+
 EXTRACTION_PROMPT = """Extract all current vehicle lease and finance offers from this dealership page.
 
 Return a JSON array. Each offer should have this structure:
@@ -66,6 +83,12 @@ ALL_MODELS = [
     "Model 3", "Model Y", "Model S", "Model X", "Cybertruck"
 ]
 
+# Strips separators so "CR-V", "cr v" and "cr_v" all normalize to "crv"
+_NORM_TABLE = str.maketrans("", "", " -_")
+
+# (model, normalized key) pairs, computed once for image matching
+_MODEL_KEYS = [(model, model.lower().translate(_NORM_TABLE)) for model in ALL_MODELS]
+
 
 def clean_html(html: str) -> str:
     """
@@ -92,13 +115,18 @@ def extract_vehicle_images(html: str, base_url: str = "") -> dict[str, str]:
     """
     Extract vehicle images from HTML and map them to model names.
 
-    Returns a dict mapping lowercase model names to image URLs.
+    Returns a dict mapping normalized model names (lowercase, no spaces,
+    hyphens or underscores) to image URLs.
     """
-    from urllib.parse import urljoin
+    from urllib.parse import urljoin, urlsplit
 
     soup = BeautifulSoup(html, "html.parser")
     model_images: dict[str, str] = {}
 
+    # Precompute scheme://host so root-relative paths skip urljoin
+    parts = urlsplit(base_url)
+    scheme_host = f"{parts.scheme}://{parts.netloc}" if parts.netloc else ""
+
     # Find all images
     for img in soup.find_all("img"):
         src = img.get("src") or img.get("data-src") or img.get("data-lazy-src")
@@ -106,10 +134,11 @@ def extract_vehicle_images(html: str, base_url: str = "") -> dict[str, str]:
             continue
 
         # Make URL absolute
-        if src.startswith("//"):
+        prefix = src[:2]
+        if prefix == "//":
             src = "https:" + src
-        elif src.startswith("/"):
-            src = urljoin(base_url, src)
+        elif prefix[:1] == "/":
+            src = scheme_host + src
         elif not src.startswith("http"):
             src = urljoin(base_url, src)
 
@@ -124,30 +153,35 @@ def extract_vehicle_images(html: str, base_url: str = "") -> dict[str, str]:
                 pass
 
         # Check image URL and alt text for model names
-        img_text = f"{src} {img.get('alt', '')} {img.get('title', '')}".lower()
+        img_text = f"{src} {img.get('alt', '')} {img.get('title', '')}".lower().translate(_NORM_TABLE)
+        src_lower = src.lower()
 
-        for model in ALL_MODELS:
-            model_lower = model.lower().replace(" ", "")
+        for model, key in _MODEL_KEYS:
             # Check if model name appears in image URL or alt text
-            if model_lower in img_text.replace(" ", "").replace("-", "").replace("_", ""):
+            if key in img_text:
                 # Prefer larger/better quality images
-                if model_lower not in model_images or "large" in src.lower() or "full" in src.lower():
-                    model_images[model_lower] = src
+                if key not in model_images or "large" in src_lower or "full" in src_lower:
+                    model_images[key] = src
                     logger.debug(f"Found image for {model}: {src[:80]}...")
 
     logger.info(f"Extracted images for {len(model_images)} models: {list(model_images.keys())}")
     return model_images
 
 
-def truncate_text(text: str, max_chars: int = 15000) -> str:
-    """Truncate text to max characters, trying to break at sentence boundaries."""
-    if len(text) <= max_chars:
+def truncate_text(text: str, max_tokens: int = 6000) -> str:
+    """Truncate text to max tokens, trying to break at sentence boundaries."""
+    enc = _encoder()
+    # Only a bounded prefix can fit in the budget, so don't encode the rest.
+    # Page text is untrusted: encode special-token strings like <|endoftext|> as plain text
+    prefix = text[:max_tokens * MAX_CHARS_PER_TOKEN]
+    ids = enc.encode(prefix, disallowed_special=())
+    if len(ids) <= max_tokens and len(prefix) == len(text):
         return text
 
-    # Try to find a good break point
-    truncated = text[:max_chars]
-    last_period = truncated.rfind(".")
-    if last_period > max_chars * 0.8:
+    # Decode the allowed prefix, then try to find a good break point
+    truncated = enc.decode(ids[:max_tokens])
+    last_period = truncated.rfind(". ")
+    if last_period > len(truncated) * 0.8:
         return truncated[:last_period + 1]
     return truncated
 
@@ -237,7 +271,7 @@ def extract_offers(html: str, dealer_name: str, base_url: str = "",
 
     # Clean and truncate HTML
     text = clean_html(html)
-    text = truncate_text(text, max_chars=15000)
+    text = truncate_text(text, max_tokens=6000)
 
     logger.info(f"Cleaned text: {len(text):,} characters")
 
@@ -258,7 +292,7 @@ def extract_offers(html: str, dealer_name: str, base_url: str = "",
 
     try:
         response = client.chat.completions.create(
-            model="gpt-4-turbo-preview",
+            model=EXTRACTION_MODEL,
             messages=[
                 {
                     "role": "system",
@@ -278,9 +312,9 @@ def extract_offers(html: str, dealer_name: str, base_url: str = "",
 
         # Attach images to offers based on model name
         for offer in offers:
-            model = offer.get("model", "").lower().replace(" ", "")
-            if model in model_images:
-                offer["image_url"] = model_images[model]
+            image_url = model_images.get((offer.get("model") or "").lower().translate(_NORM_TABLE))
+            if image_url:
+                offer["image_url"] = image_url
                 logger.debug(f"Attached image to {offer.get('model')}")
 
         # Count offers with images
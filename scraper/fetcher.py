@@ -1,30 +1,42 @@
 """Fetch dealer specials pages via requests or Playwright."""
 
+import atexit
 import logging
+import queue
+import threading
 import time
-from typing import Optional
+from typing import Callable, Iterator, Optional, Sequence, TypeVar
 
 import requests
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+from playwright.sync_api import Browser, sync_playwright, TimeoutError as PlaywrightTimeout
 
 from config import USER_AGENT, REQUEST_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Shared HTTP session: keep-alive connections and pooling across fetches,
+# so repeat requests skip the TCP/TLS handshake
+_session = requests.Session()
+_session.headers.update({
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.5",
+})
+_adapter = requests.adapters.HTTPAdapter(pool_connections=20, pool_maxsize=20)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
 
 def fetch_with_requests(url: str) -> Optional[str]:
     """
     Fetch page HTML using requests library.
     Returns HTML string or None on failure.
     """
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-    }
-
     try:
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        response = _session.get(url, timeout=REQUEST_TIMEOUT)
         response.raise_for_status()
 
         # Check content length
@@ -44,50 +56,131 @@ def fetch_with_requests(url: str) -> Optional[str]:
         return None
 
 
+# Shared Chromium instance, launched on first Playwright fetch.
+# Sync Playwright objects are bound to the thread that created them,
+# so each thread (e.g. scraper worker) keeps its own browser.
+_local = threading.local()
+
+
+def _get_browser() -> Browser:
+    """
+    Return this thread's headless browser, launching it on first use.
+    Each fetch gets its own context, so dealers don't share cookies/storage.
+    """
+    browser = getattr(_local, "browser", None)
+    if browser is None or not browser.is_connected():
+        if getattr(_local, "playwright", None) is None:
+            _local.playwright = sync_playwright().start()
+        browser = _local.playwright.chromium.launch(headless=True)
+        _local.browser = browser
+    return browser
+
+
+def close_browser() -> None:
+    """Shut down this thread's browser and Playwright driver, if running."""
+    browser = getattr(_local, "browser", None)
+    if browser is not None:
+        try:
+            browser.close()
+        except Exception:
+            pass
+        _local.browser = None
+    playwright = getattr(_local, "playwright", None)
+    if playwright is not None:
+        playwright.stop()
+        _local.playwright = None
+
+
+atexit.register(close_browser)
+
+
+def run_with_browsers(fn: Callable[[T], R], items: Sequence[T], workers: int) -> Iterator[tuple[T, R]]:
+    """
+    Call fn(item) for each item on `workers` threads, yielding (item, result)
+    as each call finishes.
+
+    Sync Playwright browsers can only be closed from the thread that launched
+    them, so each worker closes its own browser when it runs out of work, or
+    when the caller stops iterating or fn raises.
+    """
+    todo = queue.SimpleQueue()
+    for item in items:
+        todo.put(item)
+    done = queue.SimpleQueue()
+    stop = threading.Event()
+
+    def worker():
+        try:
+            while not stop.is_set():
+                try:
+                    item = todo.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    done.put((item, fn(item), None))
+                except BaseException as e:
+                    done.put((item, None, e))
+        finally:
+            close_browser()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(len(items)):
+            item, result, error = done.get()
+            if error is not None:
+                raise error
+            yield item, result
+    finally:
+        # In-progress calls finish; queued ones are skipped
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
 def fetch_with_playwright(url: str) -> Optional[str]:
     """
     Fetch page HTML using Playwright headless browser.
     Fallback for JavaScript-rendered pages.
     Returns HTML string or None on failure.
     """
+    context = None
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent=USER_AGENT,
-                viewport={"width": 1920, "height": 1080},
+        context = _get_browser().new_context(
+            user_agent=USER_AGENT,
+            viewport={"width": 1920, "height": 1080},
+        )
+        page = context.new_page()
+
+        # Navigate and wait for network to be idle
+        page.goto(url, wait_until="networkidle", timeout=REQUEST_TIMEOUT * 1000)
+
+        # Wait for dynamic content - reduced timeouts for faster scraping
+        try:
+            page.wait_for_selector(
+                "[class*='special'], [class*='offer'], [class*='price'], [class*='payment'], [class*='lease']",
+                timeout=5000
             )
-            page = context.new_page()
-
-            # Navigate and wait for network to be idle
-            page.goto(url, wait_until="networkidle", timeout=REQUEST_TIMEOUT * 1000)
-
-            # Wait for dynamic content - reduced timeouts for faster scraping
-            try:
-                page.wait_for_selector(
-                    "[class*='special'], [class*='offer'], [class*='price'], [class*='payment'], [class*='lease']",
-                    timeout=5000
-                )
-                logger.info("Found offer-related elements on page")
-            except Exception:
-                logger.debug("No specific offer selectors found, continuing...")
+            logger.info("Found offer-related elements on page")
+        except Exception:
+            logger.debug("No specific offer selectors found, continuing...")
 
-            # Brief wait for lazy-loaded content
-            time.sleep(3)
+        # Brief wait for lazy-loaded content
+        time.sleep(3)
 
-            # Quick scroll to trigger lazy loading
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(1)
+        # Quick scroll to trigger lazy loading
+        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        time.sleep(1)
 
-            content = page.content()
-            browser.close()
+        content = page.content()
 
-            if len(content) < 1000:
-                logger.warning(f"Playwright response too short ({len(content)} bytes)")
-                return None
+        if len(content) < 1000:
+            logger.warning(f"Playwright response too short ({len(content)} bytes)")
+            return None
 
-            logger.info(f"Fetched {len(content):,} bytes via Playwright")
-            return content
+        logger.info(f"Fetched {len(content):,} bytes via Playwright")
+        return content
 
     except PlaywrightTimeout:
         logger.error(f"Playwright timeout for {url}")
@@ -95,6 +188,12 @@ def fetch_with_playwright(url: str) -> Optional[str]:
     except Exception as e:
         logger.error(f"Playwright error: {e}")
         return None
+    finally:
+        if context is not None:
+            try:
+                context.close()
+            except Exception:
+                pass
 
 
 def fetch_page(url: str, use_playwright_first: bool = True) -> Optional[str]:
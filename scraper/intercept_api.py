@@ -1,9 +1,10 @@
 """Intercept API calls from dealer pages to capture offer data."""
 
+import asyncio
 import json
 import logging
 import re
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright, Browser, Page
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,16 +15,76 @@ OFFER_KEYWORDS = [
     "offer", "incentive", "special", "monthly", "inventory"
 ]
 
+# Same keywords as one case-insensitive pattern, compiled once and scanned
+# over raw response bytes
+_OFFER_RE = re.compile(
+    "|".join(re.escape(kw) for kw in OFFER_KEYWORDS).encode(),
+    re.IGNORECASE,
+)
 
-def intercept_dealer_apis(url: str):
+# Asset types the browser never needs to fetch for API interception
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "stylesheet"}
+
+# Skip JSON bodies larger than this (bytes); offer payloads are far smaller
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+
+class NetworkTracker:
+    """
+    Track a page's in-flight requests from construction on.
+    Create it before page.goto() so requests fired during navigation count.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.pending = set()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_request_done)
+        page.on("requestfailed", self._on_request_done)
+
+    def _on_request(self, request):
+        self.pending.add(request)
+
+    def _on_request_done(self, request):
+        self.pending.discard(request)
+
+    def stop(self) -> None:
+        """Detach the listeners from the page."""
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("requestfinished", self._on_request_done)
+        self.page.remove_listener("requestfailed", self._on_request_done)
+
+
+async def wait_for_quiet_network(tracker: NetworkTracker, quiet_ms: int = 1500, max_ms: int = 10000) -> None:
+    """
+    Wait until no tracked requests have been in flight for quiet_ms, or max_ms elapses.
+    Bounded replacement for wait_until="networkidle", which analytics beacons
+    and ad refreshes on dealer pages can hold open indefinitely.
+    """
+    loop = asyncio.get_running_loop()
+    start = quiet_since = loop.time()
+    while (now := loop.time()) - start < max_ms / 1000:
+        if tracker.pending:
+            quiet_since = now
+        elif now - quiet_since >= quiet_ms / 1000:
+            return
+        await asyncio.sleep(0.1)
+    logger.debug(f"Network still busy after {max_ms}ms ({len(tracker.pending)} pending)")
+
+
+async def intercept_dealer_apis(browser: Browser, url: str):
     """
-    Load a dealer page and intercept all API responses,
-    looking for ones that contain offer/pricing data.
+    Load a dealer page in its own browser context and intercept all API
+    responses, looking for ones that contain offer/pricing data.
     """
     captured_responses = []
 
-    def handle_response(response):
+    async def handle_response(response):
         """Callback for each network response."""
+        # Offer APIs are XHR/fetch calls; skip documents, scripts, etc.
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return
+
         url = response.url
         content_type = response.headers.get("content-type", "")
 
@@ -31,51 +92,118 @@ def intercept_dealer_apis(url: str):
         if "application/json" not in content_type:
             return
 
+        # Skip huge payloads before downloading them into Python
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_BODY_BYTES:
+            return
+
         try:
-            # Get the response body
-            body = response.text()
+            # Get the raw response body (no utf-8 decode needed to scan it)
+            body = await response.body()
 
-            # Check if it looks like offer data
-            body_lower = body.lower()
-            matches = sum(1 for kw in OFFER_KEYWORDS if kw in body_lower)
+            # Check if it looks like offer data: stop at the 2nd distinct keyword
+            seen = set()
+            for match in _OFFER_RE.finditer(body):
+                seen.add(match.group().lower())
+                if len(seen) >= 2:
+                    break
+            matches = len(seen)
 
             if matches >= 2:  # At least 2 keywords match
                 logger.info(f"Found potential offer API: {url[:100]}")
                 captured_responses.append({
                     "url": url,
                     "status": response.status,
-                    "body": body[:5000],  # Truncate for logging
+                    "body": body[:5000].decode("utf-8", errors="replace"),  # Truncate for logging
                     "keyword_matches": matches
                 })
         except Exception as e:
             pass  # Some responses can't be read as text
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        )
-        page = context.new_page()
-
-        # Attach response listener
+    async def block_assets(route):
+        """Abort heavy asset requests so they never load or reach Python."""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    context = await browser.new_context(
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    )
+    try:
+        await context.route("**/*", block_assets)
+        page = await context.new_page()
+
+        # Attach response listener, and track requests before navigating so
+        # offer XHRs already in flight at DOMContentLoaded are waited for
         page.on("response", handle_response)
+        tracker = NetworkTracker(page)
 
         logger.info(f"Loading: {url}")
 
-        # Navigate and wait for network to settle
-        page.goto(url, wait_until="networkidle", timeout=60000)
+        # Navigate and wait for the DOM; the offer APIs fire after this
+        await page.goto(url, wait_until="domcontentloaded", timeout=20000)
 
         # Scroll to trigger lazy loading
-        page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-
-        # Wait for any additional API calls
-        page.wait_for_timeout(5000)
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
 
-        browser.close()
+        # Wait for any additional API calls to settle
+        await wait_for_quiet_network(tracker)
+        tracker.stop()
+    finally:
+        await context.close()
 
     return captured_responses
 
 
+async def _intercept_named(browser: Browser, name: str, url: str) -> tuple[str, list[dict]]:
+    """Run intercept_dealer_apis, logging failures instead of raising."""
+    try:
+        return name, await intercept_dealer_apis(browser, url)
+    except Exception as e:
+        logger.error(f"Interception failed for {name}: {e}")
+        return name, []
+
+
+async def intercept_all(dealers: list[tuple[str, str]]):
+    """
+    Intercept APIs for all dealers concurrently, sharing one browser.
+    Yields (name, responses) as each dealer finishes.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        try:
+            tasks = [asyncio.create_task(_intercept_named(browser, name, url)) for name, url in dealers]
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            await browser.close()
+
+
+async def run(dealers: list[tuple[str, str]], output_path: str = "captured_apis.ndjson"):
+    """Print each dealer's captured APIs and stream them to NDJSON as they finish."""
+    with open(output_path, "w", buffering=1 << 20) as f:
+        async for name, responses in intercept_all(dealers):
+            print(f"\n{'='*60}")
+            print(f"Intercepted APIs for: {name}")
+            print(f"{'='*60}")
+
+            print(f"\nFound {len(responses)} potential offer API calls")
+
+            for i, resp in enumerate(responses[:5]):  # Show first 5
+                print(f"\n--- API {i+1}: {resp['url'][:80]}...")
+                print(f"    Status: {resp['status']}, Keywords: {resp['keyword_matches']}")
+                # Show snippet of body
+                body_preview = resp['body'][:500].replace('\n', ' ')
+                print(f"    Preview: {body_preview}...")
+
+            # One line per captured response; nothing is held past this dealer
+            for resp in responses:
+                f.write(json.dumps({"dealer": name, **resp}) + "\n")
+
+    print(f"\nFull results saved to {output_path}")
+
+
 def main():
     dealers = [
         ("Longo Toyota", "https://www.longotoyota.com/new-toyota-specials-los-angeles.html"),
@@ -83,29 +211,7 @@ def main():
         ("Toyota Santa Monica", "https://www.santamonicatoyota.com/new-vehicle-specials/"),
     ]
 
-    all_results = {}
-
-    for name, url in dealers:
-        print(f"\n{'='*60}")
-        print(f"Intercepting APIs for: {name}")
-        print(f"{'='*60}")
-
-        responses = intercept_dealer_apis(url)
-        all_results[name] = responses
-
-        print(f"\nFound {len(responses)} potential offer API calls")
-
-        for i, resp in enumerate(responses[:5]):  # Show first 5
-            print(f"\n--- API {i+1}: {resp['url'][:80]}...")
-            print(f"    Status: {resp['status']}, Keywords: {resp['keyword_matches']}")
-            # Show snippet of body
-            body_preview = resp['body'][:500].replace('\n', ' ')
-            print(f"    Preview: {body_preview}...")
-
-    # Save full results
-    with open("captured_apis.json", "w") as f:
-        json.dump(all_results, f, indent=2)
-    print(f"\nFull results saved to captured_apis.json")
+    asyncio.run(run(dealers))
 
 
 if __name__ == "__main__":
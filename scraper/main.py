@@ -2,12 +2,15 @@
 
 import logging
 import sys
+import threading
 from datetime import datetime
+from typing import Callable, Optional
+from urllib.parse import urlparse
 
-from config import DEALERS, LOG_LEVEL
-from fetcher import fetch_page
+from config import DEALERS, DELAY_BETWEEN_DEALERS, LOG_LEVEL, MAX_CONCURRENT_DEALERS
+from fetcher import fetch_page, run_with_browsers
 from extractor import extract_offers
-from validators import validate_offer, clean_offer
+from validators import parse_and_validate_offers
 from saver import save_offers
 
 # Configure logging
@@ -19,6 +22,40 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# One lock per host, so concurrent workers never hit the same site at once
+_host_locks: dict[str, threading.Lock] = {}
+_host_locks_guard = threading.Lock()
+
+
+def _host_lock(url: str) -> threading.Lock:
+    """Get the politeness lock for a URL's host."""
+    host = urlparse(url).netloc.lower()
+    with _host_locks_guard:
+        return _host_locks.setdefault(host, threading.Lock())
+
+
+def fetch_politely(url: str) -> Optional[str]:
+    """
+    Fetch a page while holding its host's lock, then keep the host reserved
+    for DELAY_BETWEEN_DEALERS. Different hosts are fetched in parallel.
+
+    The delay runs on a timer rather than a sleep, so this worker moves on to
+    extraction and saving while the host cools down.
+    """
+    lock = _host_lock(url)
+    lock.acquire()
+    try:
+        html = fetch_page(url)
+    except BaseException:
+        lock.release()
+        raise
+
+    release = threading.Timer(DELAY_BETWEEN_DEALERS, lock.release)
+    release.daemon = True
+    release.start()
+    return html
+
+
 def scrape_dealer(dealer: dict) -> dict:
     """
     Scrape a single dealer's specials page.
@@ -47,7 +84,7 @@ def scrape_dealer(dealer: dict) -> dict:
     try:
         # 1. Fetch page
         logger.info(f"Scraping {dealer['name']} ({dealer['specials_url']})...")
-        html = fetch_page(dealer["specials_url"])
+        html = fetch_politely(dealer["specials_url"])
 
         if not html:
             result["error"] = "Failed to fetch page"
@@ -78,13 +115,11 @@ def scrape_dealer(dealer: dict) -> dict:
 
         # 3. Validate and clean offers
         valid_offers = []
-        for offer in raw_offers:
-            is_valid, errors = validate_offer(offer)
-            if is_valid:
-                cleaned = clean_offer(offer)
-                valid_offers.append(cleaned)
-            else:
+        for cleaned, errors in parse_and_validate_offers(raw_offers):
+            if errors:
                 logger.debug(f"Invalid offer: {errors}")
+            else:
+                valid_offers.append(cleaned)
 
         result["valid"] = len(valid_offers)
         logger.info(f"Validated: {len(valid_offers)} passed, {len(raw_offers) - len(valid_offers)} failed")
@@ -108,12 +143,15 @@ def scrape_dealer(dealer: dict) -> dict:
     return result
 
 
-def main(dealer_slugs: list[str] = None):
+def main(dealer_slugs: list[str] = None,
+         on_dealer_saved: Optional[Callable[[dict], None]] = None):
     """
     Main scraper function.
 
     Args:
         dealer_slugs: List of dealer slugs to scrape. If None, scrape all.
+        on_dealer_saved: Called with the dealer dict as soon as that dealer's
+            offers are saved, so downstream work can start before the run ends.
     """
     start_time = datetime.now()
     logger.info("=" * 60)
@@ -130,21 +168,18 @@ def main(dealer_slugs: list[str] = None):
         logger.error("No dealers to scrape")
         return
 
-    logger.info(f"Scraping {len(dealers_to_scrape)} dealer(s)")
-
-    # Scrape each dealer with delay between requests
-    from config import DELAY_BETWEEN_DEALERS
-    import time
-
-    results = []
-    for i, dealer in enumerate(dealers_to_scrape):
-        result = scrape_dealer(dealer)
-        results.append(result)
-
-        # Add delay between dealers (except for last one)
-        if i < len(dealers_to_scrape) - 1:
-            logger.info(f"Waiting {DELAY_BETWEEN_DEALERS}s before next dealer...")
-            time.sleep(DELAY_BETWEEN_DEALERS)
+    workers = min(MAX_CONCURRENT_DEALERS, len(dealers_to_scrape))
+    logger.info(f"Scraping {len(dealers_to_scrape)} dealer(s), {workers} at a time")
+
+    # Scrape dealers in parallel; same-host fetches are still spaced out
+    results = [None] * len(dealers_to_scrape)
+    for i, result in run_with_browsers(lambda i: scrape_dealer(dealers_to_scrape[i]),
+                                       range(len(dealers_to_scrape)), workers):
+        dealer = dealers_to_scrape[i]
+        results[i] = result  # Report in dealer order rather than completion order
+        logger.info(f"Finished {dealer['name']}")
+        if on_dealer_saved and result["saved"]:
+            on_dealer_saved(dealer)
 
     # Print summary
     end_time = datetime.now()
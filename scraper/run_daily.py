@@ -2,6 +2,9 @@
 Daily scraper script - runs scrape + full validation in one command.
 Use this for cron jobs or manual daily runs.
 
+URL validation is pipelined with the scrape: each dealer's offers are
+checked as soon as they're saved, instead of after every dealer finishes.
+
 Usage:
     python run_daily.py
 """
@@ -10,8 +13,10 @@ import asyncio
 import logging
 from datetime import datetime
 
+import css_extractors
+import saver
 from main import main as run_scrape
-from validate_urls import full_validation
+from validate_urls import close_client, close_pool, deactivate_stale_offers, run_async, validate_and_cleanup
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,6 +26,38 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def run_pipeline(stale_hours: int = 48):
+    """Scrape in a worker thread while validating each saved dealer's URLs."""
+    loop = asyncio.get_running_loop()
+    saved_dealers: asyncio.Queue = asyncio.Queue()
+
+    def on_dealer_saved(dealer: dict):
+        # Called from the scraper thread
+        loop.call_soon_threadsafe(saved_dealers.put_nowait, dealer["slug"])
+
+    scrape = asyncio.create_task(asyncio.to_thread(run_scrape, on_dealer_saved=on_dealer_saved))
+    scrape.add_done_callback(lambda _: saved_dealers.put_nowait(None))
+
+    validated = []
+    try:
+        while (slug := await saved_dealers.get()) is not None:
+            logger.info(f"Validating URLs for {slug}...")
+            await validate_and_cleanup(only_dealers=[slug])
+            validated.append(slug)
+        await scrape
+
+        # Dealers that saved nothing this run still have older offers to check;
+        # stale cleanup runs alongside since every dealer has been refreshed
+        logger.info(f"Validating remaining URLs and deactivating stale offers (>{stale_hours}h)...")
+        await asyncio.gather(
+            validate_and_cleanup(skip_dealers=validated or None),
+            deactivate_stale_offers(stale_hours),
+        )
+    finally:
+        await close_client()
+        await close_pool()
+
+
 def main():
     start = datetime.now()
     logger.info("=" * 60)
@@ -28,13 +65,14 @@ def main():
     logger.info(f"Started: {start.strftime('%Y-%m-%d %H:%M:%S')}")
     logger.info("=" * 60)
 
-    # Step 1: Run the scraper
-    logger.info("\n[STEP 1/2] Scraping dealer offers...")
-    run_scrape()
+    # Start each run with fresh dealer IDs and parser caches
+    saver.reset_caches()
+    css_extractors.reset_caches()
 
-    # Step 2: Run full validation with stale cleanup
-    logger.info("\n[STEP 2/2] Validating URLs and cleaning stale offers...")
-    asyncio.run(full_validation(deactivate_stale=True, stale_hours=48))
+    # Scrape dealers, validating URLs as each dealer's offers land,
+    # then clean up stale offers once every dealer has been refreshed
+    logger.info("\nScraping dealer offers and validating URLs...")
+    run_async(run_pipeline(stale_hours=48))
 
     end = datetime.now()
     duration = (end - start).total_seconds()
@@ -1,20 +1,37 @@
 """Save extracted offers to the database."""
 
+import csv
+import functools
+import io
+import json
 import logging
 import uuid
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import create_engine, select, update
+from sqlalchemy import column, create_engine, select, table, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session, sessionmaker
 
-from config import DATABASE_URL
+from config import DATABASE_URL, MAX_CONCURRENT_DEALERS
 
 logger = logging.getLogger(__name__)
 
-# Create sync engine for scraper (not async like backend)
-engine = create_engine(DATABASE_URL, echo=False)
+# Dealers with more offers than this are loaded with COPY instead of INSERT
+COPY_THRESHOLD = 50
+
+# Create sync engine for scraper (not async like backend).
+# One pooled connection per scraper worker; each save is a short transaction,
+# so skip the pre-ping round trip and just recycle idle connections.
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=MAX_CONCURRENT_DEALERS,
+    max_overflow=0,
+    pool_pre_ping=False,
+    pool_recycle=1800,
+)
 SessionLocal = sessionmaker(bind=engine)
 
 
@@ -103,6 +120,22 @@ def get_dealer_by_slug(session: Session, slug: str) -> Optional[Dealer]:
     return result.scalars().first()
 
 
+@functools.lru_cache(maxsize=256)
+def _dealer_id_by_slug(slug: str) -> Optional[uuid.UUID]:
+    """
+    Look up an active dealer's ID in its own short session, cached per process.
+    Caches the ID rather than the ORM object so nothing outlives its session.
+    """
+    with SessionLocal() as session:
+        dealer = get_dealer_by_slug(session, slug)
+        return dealer.id if dealer else None
+
+
+def reset_caches() -> None:
+    """Clear the cached dealer lookups (call at the start of each run)."""
+    _dealer_id_by_slug.cache_clear()
+
+
 def get_or_create_dealer(session: Session, dealer_info: dict) -> Dealer:
     """
     Get existing dealer or create a new one.
@@ -133,19 +166,189 @@ def get_or_create_dealer(session: Session, dealer_info: dict) -> Dealer:
     return dealer
 
 
-def deactivate_dealer_offers(session: Session, dealer_id: uuid.UUID) -> int:
+def deactivate_missing_offers(session: Session, dealer_id: uuid.UUID) -> int:
     """
-    Deactivate all active offers for a dealer.
+    Deactivate a dealer's active offers that weren't upserted in this transaction.
+    NOW() is fixed at transaction start, so every row touched by the upsert
+    has updated_at == NOW() and everything older was not seen this run.
     Returns count of deactivated offers.
     """
     result = session.execute(
         update(Offer)
-        .where(Offer.dealer_id == dealer_id, Offer.active == True)
+        .where(
+            Offer.dealer_id == dealer_id,
+            Offer.active == True,
+            Offer.updated_at < func.now(),
+        )
         .values(active=False)
+        .execution_options(synchronize_session=False)
     )
     return result.rowcount
 
 
+def _num(value):
+    """
+    Prepare a NUMERIC column value, treating missing/zero values as None.
+    Numbers pass straight through (the driver adapts them); only strings
+    are parsed.
+    """
+    if not value:
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return value
+    return Decimal(str(value))
+
+
+def _offer_row(dealer_id: uuid.UUID, offer_data: dict, source_url: str) -> dict:
+    """Map a cleaned offer dict to an offers table row."""
+    # Append anchor fragment to source_url for deep linking
+    offer_source_url = source_url
+    anchor = offer_data.get("source_anchor")
+    if anchor:
+        offer_source_url = f"{source_url}#{anchor}"
+
+    return {
+        "dealer_id": dealer_id,
+        "year": offer_data["year"],
+        "make": offer_data.get("make", "Toyota"),
+        "model": offer_data["model"],
+        "trim": offer_data.get("trim"),
+        "offer_type": offer_data.get("offer_type", "lease"),
+        "monthly_payment": _num(offer_data.get("monthly_payment")),
+        "down_payment": _num(offer_data.get("down_payment")),
+        "term_months": offer_data.get("term_months"),
+        "annual_mileage": offer_data.get("annual_mileage"),
+        "apr": _num(offer_data.get("apr")),
+        "msrp": _num(offer_data.get("msrp")),
+        "selling_price": _num(offer_data.get("selling_price")),
+        "disclaimer": offer_data.get("disclaimer"),
+        "source_url": offer_source_url,
+        "image_url": offer_data.get("image_url"),
+        "confidence_score": offer_data.get("confidence", 0.8),
+        "extraction_method": offer_data.get("extraction_method", "llm_html"),
+        "raw_extracted_data": offer_data,
+        "active": True,
+        "verified_by_human": False,
+    }
+
+
+# Columns identifying "the same offer" across runs (matches uq_offers_natural_key)
+NATURAL_KEY = ("dealer_id", "year", "model", "trim", "offer_type", "term_months")
+
+
+def _dedupe_rows(rows: list[dict]) -> list[dict]:
+    """Keep the first row per natural key; one UPSERT can't touch a row twice."""
+    seen = set()
+    unique = []
+    for row in rows:
+        key = tuple(row[col] for col in NATURAL_KEY)
+        if key not in seen:
+            seen.add(key)
+            unique.append(row)
+    return unique
+
+
+def _upsert_statement(columns, source=None):
+    """
+    INSERT ... ON CONFLICT (natural key) DO UPDATE for the given row columns.
+    If source is given, rows are selected from it instead of bound as VALUES.
+    """
+    stmt = pg_insert(Offer)
+    if source is not None:
+        stmt = stmt.from_select(list(columns), select(source))
+    update_cols = {
+        col: stmt.excluded[col]
+        for col in columns
+        if col not in NATURAL_KEY and col not in ("id", "active", "verified_by_human")
+    }
+    return stmt.on_conflict_do_update(
+        index_elements=list(NATURAL_KEY),
+        index_where=(Offer.active == True),
+        set_={**update_cols, "updated_at": func.now()},
+    )
+
+
+def _upsert_rows(session: Session, rows: list[dict]) -> tuple[int, int]:
+    """
+    Upsert offer rows as one multi-row INSERT ... ON CONFLICT.
+    If the batch fails, retry row by row so one bad offer doesn't drop the rest.
+
+    Returns:
+        Tuple of (saved, errors)
+    """
+    stmt = _upsert_statement(rows[0].keys())
+    try:
+        with session.begin_nested():
+            session.execute(stmt, rows)
+        return len(rows), 0
+    except Exception as e:
+        logger.warning(f"Batch upsert failed, retrying row by row: {e}")
+
+    saved = errors = 0
+    for row in rows:
+        try:
+            with session.begin_nested():
+                session.execute(stmt, [row])
+            saved += 1
+        except Exception as e:
+            logger.error(f"Error saving offer: {e}")
+            logger.debug(f"Offer data: {row['raw_extracted_data']}")
+            errors += 1
+    return saved, errors
+
+
+def _csv_value(value):
+    """Format a row value for COPY ... (FORMAT csv, NULL '\\N')."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return value
+
+
+def _copy_upsert_rows(session: Session, rows: list[dict]) -> int:
+    """
+    Stream rows into a temp staging table with COPY, then upsert them into
+    offers with a single INSERT ... SELECT ... ON CONFLICT.
+    Returns count of saved offers.
+    """
+    columns = ["id", *rows[0].keys()]
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([str(uuid.uuid4())] + [_csv_value(row[col]) for col in columns[1:]])
+    buffer.seek(0)
+
+    with session.begin_nested():
+        # Stage only the copied columns: LIKE offers would also copy NOT NULL
+        # constraints for columns (created_at, updated_at) that get defaults
+        # only when inserted into offers
+        session.execute(text(
+            f"CREATE TEMP TABLE _offers_stage ON COMMIT DROP AS "
+            f"SELECT {', '.join(columns)} FROM offers WITH NO DATA"
+        ))
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY _offers_stage ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+        staged = session.execute(text("SELECT count(*) FROM _offers_stage")).scalar()
+        if staged != len(rows):
+            raise RuntimeError(f"COPY staged {staged} of {len(rows)} rows")
+
+        stage = table("_offers_stage", *[column(col) for col in columns])
+        session.execute(_upsert_statement(columns, source=stage))
+        session.execute(text("DROP TABLE _offers_stage"))
+    return len(rows)
+
+
 def save_offers(dealer_info: dict, offers: list[dict], source_url: str) -> dict:
     """
     Save extracted offers to the database.
@@ -160,59 +363,64 @@ def save_offers(dealer_info: dict, offers: list[dict], source_url: str) -> dict:
     """
     stats = {"deactivated": 0, "inserted": 0, "errors": 0}
 
-    with SessionLocal() as session:
-        # Get or create dealer
-        dealer = get_or_create_dealer(session, dealer_info)
+    # Cached lookup first; only unknown dealers go through get-or-create
+    dealer_id = _dealer_id_by_slug(dealer_info["slug"])
+    created = dealer_id is None
 
-        logger.info(f"Saving offers for {dealer.name} (ID: {dealer.id})")
+    with SessionLocal() as session:
+        if created:
+            dealer_id = get_or_create_dealer(session, dealer_info).id
 
-        # Deactivate old offers
-        deactivated = deactivate_dealer_offers(session, dealer.id)
-        stats["deactivated"] = deactivated
-        logger.info(f"Deactivated {deactivated} old offers")
+        logger.info(f"Saving offers for {dealer_info['name']} (ID: {dealer_id})")
 
-        # Insert new offers
+        # Build rows for a single batched upsert
+        rows = []
         for offer_data in offers:
             try:
-                # Append anchor fragment to source_url for deep linking
-                offer_source_url = source_url
-                anchor = offer_data.get("source_anchor")
-                if anchor:
-                    offer_source_url = f"{source_url}#{anchor}"
-
-                offer = Offer(
-                    dealer_id=dealer.id,
-                    year=offer_data["year"],
-                    make=offer_data.get("make", "Toyota"),
-                    model=offer_data["model"],
-                    trim=offer_data.get("trim"),
-                    offer_type=offer_data.get("offer_type", "lease"),
-                    monthly_payment=Decimal(str(offer_data["monthly_payment"])) if offer_data.get("monthly_payment") else None,
-                    down_payment=Decimal(str(offer_data["down_payment"])) if offer_data.get("down_payment") else None,
-                    term_months=offer_data.get("term_months"),
-                    annual_mileage=offer_data.get("annual_mileage"),
-                    apr=Decimal(str(offer_data["apr"])) if offer_data.get("apr") else None,
-                    msrp=Decimal(str(offer_data["msrp"])) if offer_data.get("msrp") else None,
-                    selling_price=Decimal(str(offer_data["selling_price"])) if offer_data.get("selling_price") else None,
-                    disclaimer=offer_data.get("disclaimer"),
-                    source_url=offer_source_url,
-                    image_url=offer_data.get("image_url"),
-                    confidence_score=Decimal(str(offer_data.get("confidence", 0.8))),
-                    extraction_method=offer_data.get("extraction_method", "llm_html"),
-                    raw_extracted_data=offer_data,
-                    active=True,
-                    verified_by_human=False,
-                )
-                session.add(offer)
-                stats["inserted"] += 1
-
+                rows.append(_offer_row(dealer_id, offer_data, source_url))
             except Exception as e:
                 logger.error(f"Error saving offer: {e}")
                 logger.debug(f"Offer data: {offer_data}")
                 stats["errors"] += 1
 
+        unique_rows = _dedupe_rows(rows)
+        if len(unique_rows) < len(rows):
+            logger.debug(f"Dropped {len(rows) - len(unique_rows)} offers with duplicate keys")
+
+        if len(unique_rows) > COPY_THRESHOLD:
+            try:
+                stats["inserted"] += _copy_upsert_rows(session, unique_rows)
+                unique_rows = []
+            except Exception as e:
+                logger.error(f"COPY load failed, falling back to batched upsert: {e}")
+
+        if unique_rows:
+            saved, errors = _upsert_rows(session, unique_rows)
+            stats["inserted"] += saved
+            stats["errors"] += errors
+
+        if not stats["inserted"]:
+            # Nothing was written (e.g. a systemic upsert failure): keep the
+            # dealer's existing offers active rather than wiping them
+            session.rollback()
+            logger.error(f"No offers saved for {dealer_info['name']}, keeping existing offers")
+            return stats
+
+        # Deactivate old offers that weren't seen in this run, unless some
+        # writes failed: their old rows stay active until a clean run
+        if stats["errors"]:
+            logger.warning(f"{stats['errors']} offers failed to save, skipping deactivation")
+        else:
+            deactivated = deactivate_missing_offers(session, dealer_id)
+            stats["deactivated"] = deactivated
+            logger.info(f"Deactivated {deactivated} old offers")
+
         session.commit()
-        logger.info(f"Inserted {stats['inserted']} new offers")
+        logger.info(f"Upserted {stats['inserted']} offers")
+
+    if created:
+        # Drop the cached miss now that the dealer row is committed
+        _dealer_id_by_slug.cache_clear()
 
     return stats
 
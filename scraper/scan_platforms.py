@@ -1,32 +1,58 @@
 """Scan dealer websites to identify their CMS platform and check for specials."""
 
+import json
 import logging
-from bs4 import BeautifulSoup
-from fetcher import fetch_page
+import re
+from collections import Counter
+
+from bs4 import BeautifulSoup, SoupStrainer
+from config import MAX_CONCURRENT_DEALERS
+from fetcher import fetch_page, run_with_browsers
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# All platform markers in one pattern, so the page is scanned once
+PLATFORM_RE = re.compile(
+    r"(?P<octane>octane-specials-css)"
+    r"|(?P<banner>vehicle-specials-banner)"
+    r"|(?P<vehiclename>vehicle-specials-vehiclename)"
+    r"|(?P<ddc>ddc-content|ddc-page)"
+    r"|(?P<dealer_inspire>dealer-?inspire)"
+    r"|(?P<shift_digital>shiftdigital)"
+    r"|(?P<autonation>autonation)"
+)
+
+# Offer indicator keywords, counted in a single pass
+OFFER_COUNT_RE = re.compile(r"(?P<dollar>\$)|(?P<mo>/mo)|(?P<per_month>per month)|(?P<lease>lease)|(?P<signing>due at signing)")
+
 
 def identify_platform(html: str) -> dict:
-    """Identify the dealer CMS platform from HTML markers."""
+    """
+    Identify the dealer CMS platform from HTML markers.
+    Platform markers are matched in one pass over the raw lowered HTML; offer
+    keywords are counted on the visible body text only, since script, style
+    and attribute text (jQuery "$(", "/lease-specials" links) isn't offer evidence.
+    """
+    text = html.lower()
+
+    markers = {m.lastgroup for m in PLATFORM_RE.finditer(text)}
     platforms = {
-        "octane": "octane-specials-css" in html,
-        "dealeron_gemini": "vehicle-specials-banner" in html and "vehicle-specials-vehiclename" in html,
-        "dealer_com": "ddc-content" in html or "ddc-page" in html,
-        "dealer_inspire": "dealerinspire" in html.lower() or "dealer-inspire" in html.lower(),
-        "shift_digital": "shiftdigital" in html.lower(),
-        "autonation": "autonation" in html.lower() and "specials" in html.lower(),
+        "octane": "octane" in markers,
+        "dealeron_gemini": "banner" in markers and "vehiclename" in markers,
+        "dealer_com": "ddc" in markers,
+        "dealer_inspire": "dealer_inspire" in markers,
+        "shift_digital": "shift_digital" in markers,
+        # Plain substring test: "specials" inside other markers (e.g.
+        # octane-specials-css) is consumed by their non-overlapping matches
+        "autonation": "autonation" in markers and "specials" in text,
     }
 
-    soup = BeautifulSoup(html, "html.parser")
-    text = soup.get_text().lower()
-    has_lease = "lease" in text or "/mo" in text or "per month" in text
-    has_prices = "$" in text and ("month" in text or "/mo" in text)
-
-    offer_count = 0
-    for keyword in ["$", "/mo", "per month", "lease", "due at signing"]:
-        offer_count += text.count(keyword)
+    body_text = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("body")).get_text().lower()
+    counts = Counter(m.lastgroup for m in OFFER_COUNT_RE.finditer(body_text))
+    has_lease = bool(counts["lease"] or counts["mo"] or counts["per_month"])
+    has_prices = bool(counts["dollar"]) and bool(counts["mo"] or counts["per_month"] or "month" in body_text)
+    offer_count = sum(counts.values())
 
     detected = [name for name, found in platforms.items() if found]
 
@@ -39,6 +65,34 @@ def identify_platform(html: str) -> dict:
     }
 
 
+def scan_one(url: str, name: str, make: str) -> dict:
+    """
+    Fetch one dealer page and identify its platform.
+
+    Returns:
+        Result record with dealer name, make, url, platform and page info
+    """
+    html = fetch_page(url)
+    if not html:
+        return {"name": name, "make": make, "url": url, "platform": "FAILED", "info": {}}
+
+    info = identify_platform(html)
+    platform = ", ".join(info["platforms"]) if info["platforms"] else "unknown"
+    return {"name": name, "make": make, "url": url, "platform": platform, "info": info}
+
+
+def scan_status(record: dict) -> str:
+    """Summarize whether a scanned page shows offers."""
+    info = record["info"]
+    if record["platform"] == "FAILED":
+        return "FAILED"
+    if info.get("has_prices"):
+        return "HAS PRICES"
+    if info.get("has_lease_offers"):
+        return "HAS OFFERS (no prices?)"
+    return "NO OFFERS"
+
+
 # Verified dealer URLs from web search
 DEALERS_TO_SCAN = [
     # Toyota
@@ -67,38 +121,33 @@ DEALERS_TO_SCAN = [
 if __name__ == "__main__":
     print(f"Scanning {len(DEALERS_TO_SCAN)} dealer websites...\n")
 
-    results = []
-    for url, name, make in DEALERS_TO_SCAN:
-        print(f"--- {name} ({make}) ---")
-        print(f"  URL: {url}")
-
-        html = fetch_page(url)
-        if not html:
-            print(f"  FAILED to fetch\n")
-            results.append((name, make, url, "FAILED", {}))
-            continue
-
-        info = identify_platform(html)
-        platform_str = ", ".join(info["platforms"]) if info["platforms"] else "unknown"
-        print(f"  Platform: {platform_str}")
-        print(f"  Has offers: {info['has_lease_offers']} | Has prices: {info['has_prices']}")
-        print(f"  Offer indicators: {info['offer_indicator_count']} | Page size: {info['page_size']:,}")
-        print()
-
-        results.append((name, make, url, platform_str, info))
+    workers = min(MAX_CONCURRENT_DEALERS, len(DEALERS_TO_SCAN))
+    summary = []
+
+    # Print and persist each dealer as it finishes, so a crash mid-scan keeps
+    # everything scanned so far in scan_results.ndjson
+    with open("scan_results.ndjson", "w", encoding="utf-8") as out:
+        for _, record in run_with_browsers(lambda dealer: scan_one(*dealer), DEALERS_TO_SCAN, workers):
+            info = record["info"]
+
+            print(f"--- {record['name']} ({record['make']}) ---")
+            print(f"  URL: {record['url']}")
+            if record["platform"] == "FAILED":
+                print(f"  FAILED to fetch\n")
+            else:
+                print(f"  Platform: {record['platform']}")
+                print(f"  Has offers: {info['has_lease_offers']} | Has prices: {info['has_prices']}")
+                print(f"  Offer indicators: {info['offer_indicator_count']} | Page size: {info['page_size']:,}")
+                print()
+
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            summary.append((record["platform"], scan_status(record), record["name"], record["make"]))
 
     # Summary
     print("\n" + "=" * 70)
     print("RESULTS BY PLATFORM")
     print("=" * 70)
 
-    for name, make, url, platform, info in results:
-        if platform == "FAILED":
-            status = "FAILED"
-        elif info.get("has_prices"):
-            status = "HAS PRICES"
-        elif info.get("has_lease_offers"):
-            status = "HAS OFFERS (no prices?)"
-        else:
-            status = "NO OFFERS"
+    for platform, status, name, make in summary:
         print(f"  [{platform:20s}] {status:25s} {name} ({make})")
@@ -4,9 +4,17 @@ import asyncio
 import httpx
 import asyncpg
 import os
+import re
+from collections import Counter
+from typing import Optional
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
 load_dotenv(os.path.join(os.path.dirname(__file__), '..', 'backend', '.env'))
 
 # Get DATABASE_URL and convert to asyncpg format
@@ -19,135 +27,353 @@ BAD_DOMAINS = [
     "parking.com", "sedoparking.com", "godaddy.com", "hugedomains.com",
     "afternic.com", "dan.com", "sav.com", "bodis.com"
 ]
+_BAD_DOMAINS = frozenset(BAD_DOMAINS)
+
+# Max URL checks in flight; matches the client's connection pool size
+URL_CHECK_CONCURRENCY = 32
+
+# URLs that passed within this many hours are skipped (see url_check_cache)
+URL_CACHE_HOURS = 6
+
+# Bad URLs are deactivated in batches of this size while checks continue
+DEACTIVATE_BATCH_SIZE = 32
+
+# check_url reason for connect failures/timeouts, which apply to the whole host
+HOST_UNREACHABLE = "Connection failed"
+
+# Only this much of each page is downloaded for the content checks
+MAX_CONTENT_BYTES = 64 * 1024
 
-# Keywords that suggest a legit dealer specials page
-VALID_CONTENT_KEYWORDS = ["special", "lease", "finance", "offer", "msrp", "toyota", "honda"]
+# Keywords that suggest a legit dealer specials page, most common first
+VALID_CONTENT_KEYWORDS = ["toyota", "honda", "special", "offer", "lease", "finance", "msrp"]
 
+# Phrases that mark a "not found" page served with a 200 status
+SOFT_404_PHRASES = ["page not found", "no longer available"]
+
+# Content checks run on the raw response bytes: no decode or lowercase copy
+_VALID_BYTES = tuple(kw.encode() for kw in VALID_CONTENT_KEYWORDS)
+_VALID_RE = re.compile(b"|".join(map(re.escape, _VALID_BYTES)), re.IGNORECASE)
+_SOFT_404_RE = re.compile("|".join(map(re.escape, SOFT_404_PHRASES)).encode(), re.IGNORECASE)
+
+
+# Shared HTTP client, created on first use so pooled connections (and their
+# TLS sessions) carry over between validation runs in the same event loop
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient, creating it if needed."""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        # HTTP/2 multiplexes same-dealer URLs over one connection
+        _CLIENT = httpx.AsyncClient(
+            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
+            follow_redirects=True,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=URL_CHECK_CONCURRENCY,
+                max_keepalive_connections=URL_CHECK_CONCURRENCY,
+                keepalive_expiry=30,
+            ),
+            timeout=httpx.Timeout(15.0, connect=5.0),
+        )
+    return _CLIENT
 
-async def check_url(client: httpx.AsyncClient, url: str) -> tuple[str, int, bool, str]:
+
+async def close_client() -> None:
+    """Close the shared AsyncClient. Call before the event loop shuts down."""
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
+
+# Shared database pool, created on first use (see get_client). The lock
+# keeps concurrent first callers from each creating a pool.
+_POOL: Optional[asyncpg.Pool] = None
+_POOL_LOCK: Optional[asyncio.Lock] = None
+
+
+async def get_pool() -> asyncpg.Pool:
+    """Return the shared asyncpg pool, creating it if needed."""
+    global _POOL, _POOL_LOCK
+    if _POOL is None:
+        if _POOL_LOCK is None:
+            _POOL_LOCK = asyncio.Lock()
+        async with _POOL_LOCK:
+            if _POOL is None:
+                # Statement cache disabled for pgbouncer compatibility
+                _POOL = await asyncpg.create_pool(DB_URL, statement_cache_size=0, min_size=1, max_size=4)
+    return _POOL
+
+
+async def close_pool() -> None:
+    """Close the shared asyncpg pool. Call before the event loop shuts down."""
+    global _POOL, _POOL_LOCK
+    if _POOL is not None:
+        await _POOL.close()
+        _POOL = None
+    _POOL_LOCK = None
+
+
+async def check_url(client: httpx.AsyncClient, url: str, sem: asyncio.Semaphore,
+                    host_failures: Optional[dict[str, tuple[int, str]]] = None) -> tuple[str, int, bool, str]:
     """
     Check if URL is valid with thorough validation.
+
+    Args:
+        host_failures: Per-run cache of unreachable hosts. Once one URL on a
+            host can't connect, other URLs on it fail immediately.
+
     Returns: (url, status_code, is_valid, reason)
     """
+    async with sem:
+        host = urlparse(url).netloc.lower()
+        if host_failures is not None and host in host_failures:
+            status, reason = host_failures[host]
+            return url, status, False, reason
+
+        result = await _check_url(client, url)
+        # A failed connect holds for the whole host; a slow page doesn't
+        if host_failures is not None and result[3] == HOST_UNREACHABLE:
+            host_failures[host] = (result[1], result[3])
+        return result
+
+
+def _check_response(url: str, original_domain: str,
+                    response: httpx.Response) -> Optional[tuple[str, int, bool, str]]:
+    """Run the status/redirect/domain checks. Returns a failure result or None."""
+    # Check 1: HTTP status
+    if response.status_code != 200:
+        return url, response.status_code, False, f"HTTP {response.status_code}"
+
+    return _check_domain(url, original_domain, response)
+
+
+def _check_domain(url: str, original_domain: str,
+                  response: httpx.Response) -> Optional[tuple[str, int, bool, str]]:
+    """Run the redirect/domain checks. Returns a failure result or None."""
+    final_domain = urlparse(str(response.url)).netloc.lower()
+
+    # Check 2: Domain redirect (sketchy sites often redirect)
+    if final_domain != original_domain:
+        # Allow www prefix changes
+        if not (final_domain == f"www.{original_domain}" or original_domain == f"www.{final_domain}"):
+            return url, response.status_code, False, f"Redirected to {final_domain}"
+
+    # Check 3: Known bad domains
+    bad = _bad_domain(final_domain)
+    if bad:
+        return url, response.status_code, False, f"Parked/spam domain: {bad}"
+
+    return None
+
+
+def _bad_domain(domain: str) -> Optional[str]:
+    """Return the deny-listed domain that domain is, or is a subdomain of."""
+    labels = domain.split(":")[0].split(".")
+    for i in range(len(labels) - 1):
+        suffix = ".".join(labels[i:])
+        if suffix in _BAD_DOMAINS:
+            return suffix
+    return None
+
+
+def _has_dealer_content(buf: bytearray) -> bool:
+    """True if the page mentions any dealer keyword (case-insensitive)."""
+    # Lowercase keywords almost always appear verbatim (URLs, class names), and
+    # an exact find() is a C-level scan that usually stops at the first keyword;
+    # the case-insensitive regex only runs when none of them hit
+    for keyword in _VALID_BYTES:
+        if buf.find(keyword, 0, MAX_CONTENT_BYTES) != -1:
+            return True
+    return _VALID_RE.search(buf, 0, MAX_CONTENT_BYTES) is not None
+
+
+async def _check_url(client: httpx.AsyncClient, url: str) -> tuple[str, int, bool, str]:
     try:
         original_domain = urlparse(url).netloc.lower()
 
-        response = await client.get(url, follow_redirects=True, timeout=15)
-        final_url = str(response.url)
-        final_domain = urlparse(final_url).netloc.lower()
-
-        # Check 1: HTTP status
-        if response.status_code != 200:
-            return url, response.status_code, False, f"HTTP {response.status_code}"
-
-        # Check 2: Domain redirect (sketchy sites often redirect)
-        if final_domain != original_domain:
-            # Allow www prefix changes
-            if not (final_domain == f"www.{original_domain}" or original_domain == f"www.{final_domain}"):
-                return url, response.status_code, False, f"Redirected to {final_domain}"
-
-        # Check 3: Known bad domains
-        for bad in BAD_DOMAINS:
-            if bad in final_domain:
-                return url, response.status_code, False, f"Parked/spam domain: {bad}"
+        # HEAD first: parked/off-domain redirects fail here without downloading
+        # the page. Many servers mishandle HEAD (404/405/500, timeouts), so any
+        # other HEAD outcome falls through to the GET, whose status decides.
+        get_url = url
+        try:
+            head = await client.head(url, follow_redirects=True, timeout=10)
+        except httpx.HTTPError:
+            head = None
+        if head is not None:
+            failure = _check_domain(url, original_domain, head)
+            if failure:
+                return failure
+            if head.status_code == 200:
+                get_url = str(head.url)
+
+        # Stream only the start of the page for the content checks
+        async with client.stream("GET", get_url, follow_redirects=True) as response:
+            failure = _check_response(url, original_domain, response)
+            if failure:
+                return failure
+
+            buf = bytearray()
+            async for chunk in response.aiter_bytes():
+                buf += chunk
+                if len(buf) >= MAX_CONTENT_BYTES:
+                    break
 
         # Check 4: Content validation - check if page looks like a dealer specials page
-        content = response.text.lower()
-        has_valid_content = any(keyword in content for keyword in VALID_CONTENT_KEYWORDS)
-
-        if not has_valid_content:
+        if not _has_dealer_content(buf):
             return url, response.status_code, False, "No dealer content found"
 
         # Check 5: Look for 404-like content on 200 pages
-        if "page not found" in content or "404" in content[:1000] or "no longer available" in content:
+        if buf.find(b"404", 0, 1000) != -1 or _SOFT_404_RE.search(buf, 0, MAX_CONTENT_BYTES):
             return url, response.status_code, False, "Soft 404 detected"
 
         return url, response.status_code, True, "Valid"
 
+    except (httpx.ConnectError, httpx.ConnectTimeout):
+        return url, 0, False, HOST_UNREACHABLE
     except httpx.TimeoutException:
         return url, 0, False, "Timeout"
-    except httpx.ConnectError:
-        return url, 0, False, "Connection failed"
     except Exception as e:
         return url, -1, False, f"Error: {str(e)[:50]}"
 
 
-async def validate_and_cleanup():
-    """Check all offer URLs and deactivate broken ones."""
+async def validate_and_cleanup(only_dealers: Optional[list[str]] = None,
+                               skip_dealers: Optional[list[str]] = None):
+    """
+    Check offer URLs and deactivate broken ones.
+
+    Args:
+        only_dealers: If given, only check offers from these dealer slugs
+        skip_dealers: If given, don't check offers from these dealer slugs
+    """
 
-    # Connect to database (disable statement cache for pgbouncer compatibility)
-    conn = await asyncpg.connect(DB_URL, statement_cache_size=0)
+    pool = await get_pool()
 
     # Get unique source URLs with offer count
-    rows = await conn.fetch("""
-        SELECT source_url, COUNT(*) as offer_count
-        FROM offers
-        WHERE active = true AND source_url IS NOT NULL
-        GROUP BY source_url
-    """)
+    rows = await pool.fetch("""
+        SELECT o.source_url, COUNT(*) as offer_count
+        FROM offers o
+        JOIN dealers d ON o.dealer_id = d.id
+        WHERE o.active = true AND o.source_url IS NOT NULL
+          AND ($1::text[] IS NULL OR d.slug = ANY($1::text[]))
+          AND ($2::text[] IS NULL OR d.slug <> ALL($2::text[]))
+        GROUP BY o.source_url
+    """, only_dealers, skip_dealers)
     urls_to_check = [(row['source_url'], row['offer_count']) for row in rows]
 
-    print(f"Checking {len(urls_to_check)} unique URLs ({sum(r[1] for r in urls_to_check)} total offers)...\n")
+    # Skip URLs that passed recently
+    recent = await pool.fetch("""
+        SELECT source_url
+        FROM url_check_cache
+        WHERE source_url = ANY($1::text[])
+          AND last_ok > NOW() - make_interval(hours => $2)
+    """, [url for url, _ in urls_to_check], URL_CACHE_HOURS)
+    if recent:
+        recently_ok = {row['source_url'] for row in recent}
+        urls_to_check = [(url, count) for url, count in urls_to_check if url not in recently_ok]
+        print(f"Skipping {len(recently_ok)} URLs validated in the last {URL_CACHE_HOURS}h")
 
-    async with httpx.AsyncClient(
-        headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
-        follow_redirects=True
-    ) as client:
-        tasks = [check_url(client, url) for url, _ in urls_to_check]
-        results = await asyncio.gather(*tasks)
+    print(f"Checking {len(urls_to_check)} unique URLs ({sum(r[1] for r in urls_to_check)} total offers)...\n")
 
-    bad_urls = []
+    client = get_client()
+    sem = asyncio.Semaphore(URL_CHECK_CONCURRENCY)
+    offer_counts = dict(urls_to_check)
+    host_failures = {}
+    tasks = [asyncio.create_task(check_url(client, url, sem, host_failures)) for url, _ in urls_to_check]
+
+    # Report each URL as it finishes; bad ones are deactivated in batches in
+    # the background while the remaining checks are still running
+    batch = []
+    flushes = []
+    ok_urls = []
+    bad_count = 0
+    bad_offers = 0
     print("Results:")
     print("-" * 70)
-    for (url, offer_count), (_, status, is_valid, reason) in zip(urls_to_check, results):
+    for next_result in asyncio.as_completed(tasks):
+        url, status, is_valid, reason = await next_result
+        offer_count = offer_counts[url]
         status_str = "[OK]  " if is_valid else "[BAD] "
         print(f"{status_str} ({offer_count} offers) {reason}")
         print(f"       {url[:65]}...")
-        if not is_valid:
-            bad_urls.append((url, offer_count, reason))
+        if is_valid:
+            ok_urls.append(url)
+        else:
+            bad_count += 1
+            bad_offers += offer_count
+            batch.append((url, reason))
+            if len(batch) >= DEACTIVATE_BATCH_SIZE:
+                flushes.append(asyncio.create_task(_deactivate_urls(pool, batch)))
+                batch = []
 
     print("-" * 70)
 
-    if not bad_urls:
+    if ok_urls:
+        # Expired entries can't skip a check any more, so prune them in the same
+        # statement (URLs being refreshed are left to the upsert)
+        await pool.execute("""
+            WITH expired AS (
+                DELETE FROM url_check_cache
+                WHERE last_ok <= NOW() - make_interval(hours => $2)
+                  AND source_url <> ALL($1::text[])
+            )
+            INSERT INTO url_check_cache (source_url, last_ok)
+            SELECT unnest($1::text[]), NOW()
+            ON CONFLICT (source_url) DO UPDATE SET last_ok = EXCLUDED.last_ok
+        """, ok_urls, URL_CACHE_HOURS)
+
+    if not bad_count:
         print("\nAll URLs are valid!")
-        await conn.close()
         return
 
-    total_bad_offers = sum(count for _, count, _ in bad_urls)
-    print(f"\nFound {len(bad_urls)} bad URLs affecting {total_bad_offers} offers.")
+    print(f"\nFound {bad_count} bad URLs affecting {bad_offers} offers.")
     print("Deactivating...")
+    if batch:
+        flushes.append(asyncio.create_task(_deactivate_urls(pool, batch)))
+    await asyncio.gather(*flushes)
 
-    for bad_url, count, reason in bad_urls:
-        result = await conn.execute(
-            "UPDATE offers SET active = false WHERE source_url = $1 AND active = true",
-            bad_url
-        )
-        actual_count = int(result.split()[-1]) if result else 0
-        print(f"  Deactivated {actual_count} offers - {reason}")
-
-    await conn.close()
     print("\nDone! Bad listings have been deactivated.")
 
 
+async def _deactivate_urls(pool: asyncpg.Pool, bad_urls: list[tuple[str, str]]) -> None:
+    """Deactivate offers for a batch of (url, reason) pairs and report per URL."""
+    # COPY the bad URLs into a temp table and deactivate with one join;
+    # RETURNING gives the per-URL counts for the report
+    async with pool.acquire() as conn, conn.transaction():
+        await conn.execute("CREATE TEMP TABLE _bad_urls (url text) ON COMMIT DROP")
+        await conn.copy_records_to_table("_bad_urls", records=[(url,) for url, _ in bad_urls])
+        deactivated = await conn.fetch("""
+            UPDATE offers o
+            SET active = false
+            FROM _bad_urls b
+            WHERE o.source_url = b.url AND o.active = true
+            RETURNING o.source_url
+        """)
+    counts = Counter(row["source_url"] for row in deactivated)
+    for bad_url, reason in bad_urls:
+        print(f"  Deactivated {counts.get(bad_url, 0)} offers - {reason}")
+
+
 async def check_stale_offers(max_age_hours: int = 48):
     """Check for offers that haven't been refreshed recently."""
 
-    conn = await asyncpg.connect(DB_URL, statement_cache_size=0)
+    pool = await get_pool()
 
     # Find offers older than max_age_hours
-    stale = await conn.fetch(f"""
+    stale = await pool.fetch("""
         SELECT o.id, o.model, o.trim, d.name as dealer_name, o.updated_at,
                EXTRACT(EPOCH FROM (NOW() - o.updated_at)) / 3600 as hours_old
         FROM offers o
         JOIN dealers d ON o.dealer_id = d.id
         WHERE o.active = true
-          AND o.updated_at < NOW() - INTERVAL '{max_age_hours} hours'
+          AND o.updated_at < NOW() - make_interval(hours => $1)
         ORDER BY o.updated_at ASC
-    """)
+    """, max_age_hours)
 
     if not stale:
         print(f"\nNo offers older than {max_age_hours} hours. Data is fresh!")
-        await conn.close()
         return
 
     print(f"\nFound {len(stale)} stale offers (>{max_age_hours}h old):")
@@ -160,26 +386,22 @@ async def check_stale_offers(max_age_hours: int = 48):
     print(f"\nThese offers may be outdated. Run a fresh scrape to update them.")
     print("To deactivate stale offers, call: deactivate_stale_offers()")
 
-    await conn.close()
-
 
 async def deactivate_stale_offers(max_age_hours: int = 48):
     """Deactivate offers that are too old."""
 
-    conn = await asyncpg.connect(DB_URL, statement_cache_size=0)
+    pool = await get_pool()
 
-    result = await conn.execute(f"""
+    result = await pool.execute("""
         UPDATE offers
         SET active = false
         WHERE active = true
-          AND updated_at < NOW() - INTERVAL '{max_age_hours} hours'
-    """)
+          AND updated_at < NOW() - make_interval(hours => $1)
+    """, max_age_hours)
 
     count = int(result.split()[-1]) if result else 0
     print(f"Deactivated {count} stale offers (>{max_age_hours}h old)")
 
-    await conn.close()
-
 
 async def full_validation(deactivate_stale: bool = False, stale_hours: int = 48):
     """Run full validation: URL checks + staleness check."""
@@ -187,32 +409,46 @@ async def full_validation(deactivate_stale: bool = False, stale_hours: int = 48)
     print("FULL OFFER VALIDATION")
     print("=" * 60)
 
-    # Step 1: Validate URLs
-    print("\n[1/2] Checking URLs...")
-    await validate_and_cleanup()
-
-    # Step 2: Check staleness
-    print(f"\n[2/2] Checking for stale offers (>{stale_hours}h)...")
+    # URL checks are network-bound and the staleness check is one query, so
+    # run them side by side (each takes its own pooled connection)
+    print(f"\nChecking URLs and stale offers (>{stale_hours}h)...")
     if deactivate_stale:
-        await deactivate_stale_offers(stale_hours)
+        stale_step = deactivate_stale_offers(stale_hours)
     else:
-        await check_stale_offers(stale_hours)
+        stale_step = check_stale_offers(stale_hours)
+    await asyncio.gather(validate_and_cleanup(), stale_step)
 
     print("\n" + "=" * 60)
     print("Validation complete!")
     print("=" * 60)
 
 
+def run_async(coro):
+    """Run coro to completion, on uvloop's faster event loop when it's installed."""
+    if uvloop is not None:
+        return uvloop.run(coro)
+    return asyncio.run(coro)
+
+
+async def _run_and_close(coro):
+    """Await coro, then close the shared client and pool inside the same event loop."""
+    try:
+        await coro
+    finally:
+        await close_client()
+        await close_pool()
+
+
 if __name__ == "__main__":
     import sys
 
     if "--full" in sys.argv:
         # Full validation with staleness check
         deactivate = "--deactivate-stale" in sys.argv
-        asyncio.run(full_validation(deactivate_stale=deactivate))
+        run_async(_run_and_close(full_validation(deactivate_stale=deactivate)))
     elif "--stale" in sys.argv:
         # Just check stale offers
-        asyncio.run(check_stale_offers())
+        run_async(_run_and_close(check_stale_offers()))
     else:
         # Default: just URL validation
-        asyncio.run(validate_and_cleanup())
+        run_async(_run_and_close(validate_and_cleanup()))
@@ -1,6 +1,8 @@
 """Validate and clean extracted offer data."""
 
+import functools
 import logging
+import re
 from datetime import datetime
 from typing import Optional
 
@@ -11,6 +13,15 @@ logger = logging.getLogger(__name__)
 # Valid term lengths
 VALID_TERMS = [24, 27, 30, 33, 36, 39, 42, 48, 60, 72]
 
+
+def _closest_term(term: int) -> int:
+    """Snap a term length to the nearest valid term."""
+    return min(VALID_TERMS, key=lambda x: abs(x - term))
+
+
+# Nearest valid term, indexed by every plausible term length
+_SNAP = [_closest_term(t) for t in range(100)]
+
 # Current and next year
 CURRENT_YEAR = datetime.now().year
 VALID_YEARS = [CURRENT_YEAR, CURRENT_YEAR + 1, CURRENT_YEAR - 1]
@@ -19,6 +30,67 @@ VALID_YEARS = [CURRENT_YEAR, CURRENT_YEAR + 1, CURRENT_YEAR - 1]
 VALID_MAKES = ["Toyota", "Honda", "Tesla"]
 
 
+# Spelling variations seen on dealer sites, matched anywhere in the model text
+_VARIATIONS = {
+    # Toyota
+    "rav 4": "RAV4",
+    "rav-4": "RAV4",
+    "4 runner": "4Runner",
+    "4-runner": "4Runner",
+    "gr 86": "GR86",
+    "gr-86": "GR86",
+    "gr supra": "GR Supra",
+    "gr-supra": "GR Supra",
+    "corolla cross": "Corolla Cross",
+    "grand highlander": "Grand Highlander",
+    "land cruiser": "Land Cruiser",
+    # Honda
+    "cr-v": "CR-V",
+    "crv": "CR-V",
+    "hr-v": "HR-V",
+    "hrv": "HR-V",
+    # Tesla
+    "model3": "Model 3",
+    "modely": "Model Y",
+    "models": "Model S",
+    "modelx": "Model X",
+}
+
+# Lookup tables built once at import
+_EXACT = {m.lower(): m for m in ALL_MODELS}
+_VAR_RE = re.compile("|".join(re.escape(v) for v in _VARIATIONS))
+
+
+def _build_contained_in() -> dict[str, int]:
+    """Map every substring of a known model name to the first model containing it."""
+    table = {}
+    for i, model in enumerate(ALL_MODELS):
+        name = model.lower()
+        for start in range(len(name)):
+            for end in range(start + 1, len(name) + 1):
+                table.setdefault(name[start:end], i)
+    return table
+
+
+_CONTAINED_IN = _build_contained_in()
+
+# Known model names found anywhere in the text, one scan. The lookahead reports
+# a match at every position, and alternatives are tried in ALL_MODELS order, so
+# each position yields the earliest-listed model starting there.
+_KNOWN_INDEX = {m.lower(): i for i, m in reversed(list(enumerate(ALL_MODELS)))}
+_KNOWN_RE = re.compile("(?=(" + "|".join(re.escape(m.lower()) for m in ALL_MODELS) + "))")
+
+
+def _first_containing_model(model_lower: str) -> Optional[str]:
+    """First known model (in ALL_MODELS order) that contains, or is contained in, the text."""
+    hits = [_KNOWN_INDEX[m.group(1)] for m in _KNOWN_RE.finditer(model_lower)]
+    contained = _CONTAINED_IN.get(model_lower)
+    if contained is not None:
+        hits.append(contained)
+    return ALL_MODELS[min(hits)] if hits else None
+
+
+@functools.lru_cache(maxsize=4096)
 def normalize_model_name(model: str) -> Optional[str]:
     """
     Normalize model name to match our known models (Toyota, Honda, Tesla).
@@ -29,47 +101,25 @@ def normalize_model_name(model: str) -> Optional[str]:
 
     model_lower = model.lower().strip()
 
-    for known_model in ALL_MODELS:
-        if known_model.lower() == model_lower:
-            return known_model
-        # Handle common variations
-        if model_lower in known_model.lower() or known_model.lower() in model_lower:
-            return known_model
+    exact = _EXACT.get(model_lower)
+    if exact:
+        return exact
 
-    # Handle specific variations
-    variations = {
-        # Toyota
-        "rav 4": "RAV4",
-        "rav-4": "RAV4",
-        "4 runner": "4Runner",
-        "4-runner": "4Runner",
-        "gr 86": "GR86",
-        "gr-86": "GR86",
-        "gr supra": "GR Supra",
-        "gr-supra": "GR Supra",
-        "corolla cross": "Corolla Cross",
-        "grand highlander": "Grand Highlander",
-        "land cruiser": "Land Cruiser",
-        # Honda
-        "cr-v": "CR-V",
-        "crv": "CR-V",
-        "hr-v": "HR-V",
-        "hrv": "HR-V",
-        # Tesla
-        "model3": "Model 3",
-        "modely": "Model Y",
-        "models": "Model S",
-        "modelx": "Model X",
-    }
+    # Handle common variations
+    known = _first_containing_model(model_lower)
+    if known:
+        return known
 
-    for variation, normalized in variations.items():
-        if variation in model_lower:
-            return normalized
+    # Handle specific variations
+    match = _VAR_RE.search(model_lower)
+    if match:
+        return _VARIATIONS[match.group()]
 
     logger.warning(f"Unknown model: {model}")
     return None
 
 
+@functools.lru_cache(maxsize=4096)
 def normalize_make(make: str) -> str:
     """Normalize make name."""
     if not make:
@@ -81,90 +131,184 @@ def normalize_make(make: str) -> str:
     return make.title()  # Capitalize if unknown
 
 
-def validate_offer(offer: dict) -> tuple[bool, list[str]]:
+# Numeric offer fields: (name, type, default when the key is missing).
+# Coerced column by column across a batch before validation.
+_NUMERIC_FIELDS = [
+    ("monthly_payment", float, None),
+    ("down_payment", float, None),
+    ("term_months", int, None),
+    ("year", int, None),
+    ("confidence", float, 0.8),
+    ("annual_mileage", int, None),
+    ("apr", float, None),
+    ("msrp", float, None),
+    ("selling_price", float, None),
+]
+
+# Numeric fields that are only cleaned, not range-checked
+_PASS_THROUGH_FIELDS = ["annual_mileage", "apr", "msrp", "selling_price"]
+
+# Marks a raw value that couldn't be converted
+_INVALID = object()
+
+
+def _coerce_column(values: list, cast) -> list:
     """
-    Validate an extracted offer.
+    Convert one field's values across a batch of offers.
+    None stays None, values already of the target type (the common case for
+    JSON/CSS-extracted numbers) pass through unconverted, and unparseable
+    values become _INVALID.
+    """
+    out = []
+    for value in values:
+        if value is None or type(value) is cast:
+            out.append(value)
+        else:
+            try:
+                out.append(cast(value))
+            except (TypeError, ValueError):
+                out.append(_INVALID)
+    return out
+
+
+def parse_and_validate_offers(offers: list[dict]) -> list[tuple[dict, list[str]]]:
+    """
+    Validate and clean a batch of extracted offers (see parse_and_validate).
+    Numeric fields are coerced a column at a time, then each offer is checked
+    against its pre-parsed values.
 
     Returns:
-        Tuple of (is_valid, list of error messages)
+        List of (cleaned offer, list of error messages), in input order
     """
+    columns = [
+        (field, _coerce_column([offer.get(field, default) for offer in offers], cast))
+        for field, cast, default in _NUMERIC_FIELDS
+    ]
+    return [
+        _parse_and_validate(offer, {field: column[i] for field, column in columns})
+        for i, offer in enumerate(offers)
+    ]
+
+
+def parse_and_validate(offer: dict) -> tuple[dict, list[str]]:
+    """
+    Validate an extracted offer and clean it in the same pass.
+    Each field is parsed once and the result feeds both the checks and the
+    cleaned offer.
+
+    Returns:
+        Tuple of (cleaned offer, list of error messages). The offer is valid
+        if the error list is empty.
+    """
+    return parse_and_validate_offers([offer])[0]
+
+
+def _parse_and_validate(offer: dict, parsed: dict) -> tuple[dict, list[str]]:
     errors = []
 
     # Required fields
-    if not offer.get("model"):
+    model = offer.get("model", "")
+    if not model:
         errors.append("Missing model")
 
-    if not offer.get("year"):
+    raw_year = offer.get("year")
+    if not raw_year:
         errors.append("Missing year")
 
-    # Validate monthly payment
-    monthly = offer.get("monthly_payment")
-    if monthly is not None:
-        try:
-            monthly = float(monthly)
-            if monthly < 50 or monthly > 2000:
-                errors.append(f"monthly_payment out of range: {monthly}")
-        except (TypeError, ValueError):
-            errors.append(f"Invalid monthly_payment: {monthly}")
-
-    # Validate down payment
-    down = offer.get("down_payment")
-    if down is not None:
-        try:
-            down = float(down)
-            if down < 0 or down > 20000:
-                errors.append(f"down_payment out of range: {down}")
-        except (TypeError, ValueError):
-            errors.append(f"Invalid down_payment: {down}")
-
-    # Validate term
-    term = offer.get("term_months")
-    if term is not None:
-        try:
-            term = int(term)
-            if term not in VALID_TERMS:
-                # Allow close matches
-                closest = min(VALID_TERMS, key=lambda x: abs(x - term))
-                if abs(closest - term) <= 3:
-                    logger.debug(f"Adjusted term {term} to {closest}")
-                else:
-                    errors.append(f"Invalid term_months: {term}")
-        except (TypeError, ValueError):
+    # Monthly payment
+    raw_monthly = offer.get("monthly_payment")
+    monthly = parsed["monthly_payment"]
+    if monthly is _INVALID:
+        errors.append(f"Invalid monthly_payment: {raw_monthly}")
+        monthly = None
+    elif monthly is not None and (monthly < 50 or monthly > 2000):
+        errors.append(f"monthly_payment out of range: {monthly}")
+
+    # Down payment
+    raw_down = offer.get("down_payment")
+    down = parsed["down_payment"]
+    if down is _INVALID:
+        errors.append(f"Invalid down_payment: {raw_down}")
+        down = None
+    elif down is not None and (down < 0 or down > 20000):
+        errors.append(f"down_payment out of range: {down}")
+
+    # Term (snap to closest valid term, error if it's too far off)
+    raw_term = offer.get("term_months")
+    term = parsed["term_months"]
+    if term is _INVALID:
+        errors.append(f"Invalid term_months: {raw_term}")
+        term = None
+    elif term is not None and term not in VALID_TERMS:
+        closest = _SNAP[term] if 0 <= term < 100 else _closest_term(term)
+        if abs(closest - term) <= 3:
+            logger.debug(f"Adjusted term {term} to {closest}")
+        else:
             errors.append(f"Invalid term_months: {term}")
+        term = closest
+
+    # Year
+    year = parsed["year"]
+    if year is _INVALID:
+        errors.append(f"Invalid year: {raw_year}")
+        year = CURRENT_YEAR
+    elif year is None:
+        year = CURRENT_YEAR
+    elif year not in VALID_YEARS:
+        errors.append(f"Invalid year: {year}")
+
+    # Model name
+    normalized = normalize_model_name(model)
+    if model and normalized is None:
+        errors.append(f"Unknown model: {model}")
+
+    # Confidence
+    confidence = parsed["confidence"]
+    if confidence is None or confidence is _INVALID:
+        confidence = 0.8  # Use default
+    elif confidence < 0.5:
+        errors.append(f"Confidence too low: {confidence}")
 
-    # Validate year
-    year = offer.get("year")
-    if year is not None:
-        try:
-            year = int(year)
-            if year not in VALID_YEARS:
-                errors.append(f"Invalid year: {year}")
-        except (TypeError, ValueError):
-            errors.append(f"Invalid year: {year}")
-
-    # Validate model name
-    model = offer.get("model")
-    if model:
-        normalized = normalize_model_name(model)
-        if normalized is None:
-            errors.append(f"Unknown model: {model}")
-
-    # Validate confidence
-    confidence = offer.get("confidence", 0.8)
-    try:
-        confidence = float(confidence)
-        if confidence < 0.5:
-            errors.append(f"Confidence too low: {confidence}")
-    except (TypeError, ValueError):
-        pass  # Use default
-
-    # Validate offer type
+    # Offer type
     offer_type = offer.get("offer_type", "lease")
     if offer_type not in ["lease", "finance"]:
         errors.append(f"Invalid offer_type: {offer_type}")
+    if isinstance(offer_type, str):
+        offer_type = offer_type.lower()
+    if offer_type not in ["lease", "finance"]:
+        offer_type = "lease"
+
+    cleaned = {
+        "year": year,
+        "make": normalize_make(offer.get("make", "Toyota")),
+        "image_url": offer.get("image_url"),
+        "model": normalized or model,
+        "trim": offer.get("trim") or None,
+        "offer_type": offer_type,
+        # Empty values are stored as None
+        "monthly_payment": monthly if raw_monthly else None,
+        "down_payment": down if raw_down else None,
+    }
+    for field in _PASS_THROUGH_FIELDS:
+        value = parsed[field]
+        cleaned[field] = value if offer.get(field) and value is not _INVALID else None
+    cleaned["term_months"] = term if raw_term else None
+    cleaned["offer_end_date"] = offer.get("offer_end_date") or None
+    cleaned["disclaimer"] = offer.get("disclaimer") or None
+    cleaned["confidence"] = confidence
 
-    is_valid = len(errors) == 0
-    return is_valid, errors
+    return cleaned, errors
+
+
+def validate_offer(offer: dict) -> tuple[bool, list[str]]:
+    """
+    Validate an extracted offer.
+
+    Returns:
+        Tuple of (is_valid, list of error messages)
+    """
+    _, errors = parse_and_validate(offer)
+    return len(errors) == 0, errors
 
 
 def clean_offer(offer: dict) -> dict:
@@ -172,89 +316,7 @@ def clean_offer(offer: dict) -> dict:
     Clean and normalize offer data.
     Converts strings to proper types, normalizes model names, etc.
     """
-    cleaned = {}
-
-    # Year
-    try:
-        cleaned["year"] = int(offer.get("year", CURRENT_YEAR))
-    except (TypeError, ValueError):
-        cleaned["year"] = CURRENT_YEAR
-
-    # Make (Toyota, Honda, Tesla, etc.)
-    cleaned["make"] = normalize_make(offer.get("make", "Toyota"))
-
-    # Image URL (pass through if present)
-    cleaned["image_url"] = offer.get("image_url")
-
-    # Model (normalized)
-    model = offer.get("model", "")
-    cleaned["model"] = normalize_model_name(model) or model
-
-    # Trim
-    cleaned["trim"] = offer.get("trim") or None
-
-    # Offer type
-    offer_type = offer.get("offer_type", "lease").lower()
-    cleaned["offer_type"] = offer_type if offer_type in ["lease", "finance"] else "lease"
-
-    # Monthly payment
-    try:
-        cleaned["monthly_payment"] = float(offer["monthly_payment"]) if offer.get("monthly_payment") else None
-    except (TypeError, ValueError):
-        cleaned["monthly_payment"] = None
-
-    # Down payment
-    try:
-        cleaned["down_payment"] = float(offer["down_payment"]) if offer.get("down_payment") else None
-    except (TypeError, ValueError):
-        cleaned["down_payment"] = None
-
-    # Term months
-    try:
-        term = int(offer["term_months"]) if offer.get("term_months") else None
-        if term and term not in VALID_TERMS:
-            # Snap to closest valid term
-            term = min(VALID_TERMS, key=lambda x: abs(x - term))
-        cleaned["term_months"] = term
-    except (TypeError, ValueError):
-        cleaned["term_months"] = None
-
-    # Annual mileage
-    try:
-        cleaned["annual_mileage"] = int(offer["annual_mileage"]) if offer.get("annual_mileage") else None
-    except (TypeError, ValueError):
-        cleaned["annual_mileage"] = None
-
-    # APR
-    try:
-        cleaned["apr"] = float(offer["apr"]) if offer.get("apr") else None
-    except (TypeError, ValueError):
-        cleaned["apr"] = None
-
-    # MSRP
-    try:
-        cleaned["msrp"] = float(offer["msrp"]) if offer.get("msrp") else None
-    except (TypeError, ValueError):
-        cleaned["msrp"] = None
-
-    # Selling price
-    try:
-        cleaned["selling_price"] = float(offer["selling_price"]) if offer.get("selling_price") else None
-    except (TypeError, ValueError):
-        cleaned["selling_price"] = None
-
-    # Offer end date
-    cleaned["offer_end_date"] = offer.get("offer_end_date") or None
-
-    # Disclaimer
-    cleaned["disclaimer"] = offer.get("disclaimer") or None
-
-    # Confidence
-    try:
-        cleaned["confidence"] = float(offer.get("confidence", 0.8))
-    except (TypeError, ValueError):
-        cleaned["confidence"] = 0.8
-
+    cleaned, _ = parse_and_validate(offer)
     return cleaned
 
 